@@ -2,9 +2,7 @@ import streamlit as st
 import sys
 import os
 import pandas as pd
-import altair as alt
 import plotly.express as px
-from datetime import datetime
 import warnings
 import re
 import glob
@@ -12,20 +10,23 @@ import glob
 # supress warnings from printing on app
 warnings.filterwarnings('ignore')
 
-cwd = os.path.abspath(__file__)
-sys.path.append(os.path.join(cwd, '..', '..', 'utils'))
-import llm_rag as lm
-from infection_scraper import FluDataHandler
+cwd = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(cwd, '..', 'utils'))
+# llm_rag (faiss/langchain) and infection_scraper (delphi_epidata) are imported
+# lazily in the tabs that use them to keep cold starts fast
+from region_rollup import RegionRollup
+from dashboard_frames import derive_dashboard_frame
+from metrics import metrics
 
 st.set_page_config(layout="wide")
 
 # Add an official-looking image to the app
-banner = os.path.join(cwd,'..', 'assets', 'header_image_chat2.jpg')
-inf_data = os.path.join(cwd, '..', '..', '..', 'data', 'tmp')
-ref_data = os.path.join(cwd, '..', '..', '..', 'data', 'ref')
-pop_data = os.path.join(cwd, '..', '..', '..', 'data', 'ref', 'state_populations.csv')
-images = os.path.join(cwd,'..', '..', '..', 'data', 'assets')
-cfg_dir = os.path.join(cwd,'..', '..', '..', 'cfg')
+banner = os.path.join(cwd, 'assets', 'header_image_chat2.jpg')
+inf_data = os.path.join(cwd, '..', '..', 'data', 'tmp')
+ref_data = os.path.join(cwd, '..', '..', 'data', 'ref')
+pop_data = os.path.join(cwd, '..', '..', 'data', 'ref', 'state_populations.csv')
+images = os.path.join(cwd, '..', '..', 'data', 'assets')
+cfg_dir = os.path.join(cwd, '..', '..', 'cfg')
 
 # Sidebar for navigation
 st.sidebar.image(os.path.join(images,'ds_portfolio_logo_v2.png'))
@@ -52,10 +53,13 @@ if option == "Infection Cases & Rates":
     # Refresh data on command to avoid expense on pipelines
     if st.button('Refresh Data'):
         # Rerun data scraper
+        from infection_scraper import FluDataHandler
         ih = FluDataHandler(cfg_dir, inf_data, ref_data)
         inf_file = ih.update_infection_data()
+        metrics.flush()
         df =  pd.read_csv(inf_file) # Load or refresh your data here
         st.session_state['data'] = df #Save to session state which will persist
+        st.session_state['data_version'] = f"{os.path.basename(inf_file)}@{os.path.getmtime(inf_file)}"
         
     else:
         if 'data' not in st.session_state:
@@ -69,20 +73,20 @@ if option == "Infection Cases & Rates":
             # Load
             df =  pd.read_csv(os.path.join(inf_data, most_recent))
             st.session_state['data'] =  df
+            st.session_state['data_version'] = f"{most_recent}@{os.path.getmtime(os.path.join(inf_data, most_recent))}"
+
+    # Region/nation aggregates are only rebuilt when the data version (file name and mtime) changes
+    if 'rollup' not in st.session_state:
+        st.session_state['rollup'] = RegionRollup(ref_data)
+    rollup = st.session_state['rollup']
+    rollup.build(st.session_state['data'], version=st.session_state['data_version'])
 
     # Load COVID-19 data
     if os.path.exists(inf_data):
         #df = pd.read_csv(inf_data)
         df = st.session_state['data']
         population_df = pd.read_csv(pop_data)
-        df = df.merge(population_df, left_on='region', right_on='state_abbreviation', how='left')
-        df['infection_rate'] = (df['num_ili'].astype(float) / df['Pop.2023'].astype(float)) * 100000  # Infection rate per 100,000 people
-
-        # Convert epiweek to a start date of the week
-        df['year'] = df['epiweek'].astype(str).str[:4].astype(int)
-        df['week'] = df['epiweek'].astype(str).str[4:].astype(int)
-        df['date'] = df.apply(lambda x: datetime.strptime(f"{x['year']}-W{x['week']}-1", "%Y-W%W-%w"), axis=1)
-        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        df = derive_dashboard_frame(df, population_df)
 
         # Define the color range for consistency
         num_ili_max = df['num_ili'].max()
@@ -119,12 +123,26 @@ if option == "Infection Cases & Rates":
 
         # Display the stacked line plot of COVID-19 infections over time by region
         st.write("### COVID-19 Infections Over Time by Region")
-        df_r = df[~df['region_name'].isnull()]
+        week_dates = df[['epiweek', 'date']].drop_duplicates('epiweek').set_index('epiweek')['date']
+        df_r = rollup.aggregate('CEN')
+        df_r = df_r.assign(date=df_r['epiweek'].map(week_dates))
         fig_line = px.area(df_r, x='date', y='num_ili', color='region_name',
                            #title='COVID-19 Infections Over Time by State',
                            labels={'num_ili': 'COVID-19 Cases', 'epiweek': 'Epiweek', 'region': 'Region'})
         st.plotly_chart(fig_line)
-        
+
+        # Drill down from a region to its member states, served from the rollup's state index
+        st.write("### Region Drill-Down")
+        region_codes = sorted(rollup.region_states, key=lambda code: (rollup.region_level(code), len(code), code))
+        region_code = st.selectbox("Select a region", region_codes,
+                                   format_func=lambda code: f"{code} - {rollup.region_names[code]}")
+        df_s = rollup.drill_down(region_code).reset_index()
+        df_s = df_s.assign(date=df_s['epiweek'].map(week_dates))
+        fig_states = px.area(df_s, x='date', y='num_ili', color='region',
+                             labels={'num_ili': 'COVID-19 Cases', 'region': 'State'})
+        st.plotly_chart(fig_states)
+        st.caption("NY is reported by FluView as NY_MINUS_JFK, which excludes New York City.")
+
     else:
         st.error("Data file not found. Please upload the COVID-19 data.")
 
@@ -132,8 +150,20 @@ if option == "Infection Cases & Rates":
 # COVID-19 Analysis tab
 elif option == "COVID-19 LLM News Analyst":
 
-    llm = lm.LLMRag()
-    llm.prep_retrieval()
+    # The LLM stack is loaded and the retrieval chain built on first use of this tab only
+    if 'llm' not in st.session_state:
+        with st.spinner('Loading the News Analyst...'):
+            import llm_rag as lm
+            st.session_state['llm'] = lm.LLMRag()
+    llm = st.session_state['llm']
+
+    index_error = None
+    if llm.retrieval_qa_chain is None:
+        try:
+            with st.spinner('Preparing the news index...'):
+                llm.prep_retrieval()
+        except FileNotFoundError as e:
+            index_error = e
 
     col1, col2, col3 = st.columns([1, 3, 1])
     with col2:
@@ -141,16 +171,23 @@ elif option == "COVID-19 LLM News Analyst":
         st.title('AI COVID News Explorer')
         st.image(banner, caption='Stay up-to-date on the latest, with the AI COVID assistant', use_container_width=True)
 
+        if index_error is not None:
+            st.warning(f"{index_error}")
+
         # Refresh data on command to avoid expense on pipelines
         if st.button('Refresh Data'):
             llm.update_vectordb()
+            metrics.flush()
+            llm.prep_retrieval()
 
         # Add a text input for user queries
         user_query = st.text_input('Enter your questions about recent COVID-19 trends:')
 
         # Add a button to run the query
         if st.button('Run Query'):
-            if user_query:
+            if llm.retrieval_qa_chain is None:
+                st.warning('The news index is not built yet. Use Refresh Data to scrape news and build it.')
+            elif user_query:
                 # Run the query using the prepared model
                 result = llm.run_query(user_query)
 
@@ -178,14 +215,14 @@ elif option == "About":
 
     # Overview
     #st.write('## Overview')
-    over_doc = os.path.join(cwd,'..', 'desc', 'overview.md')
+    over_doc = os.path.join(cwd, 'desc', 'overview.md')
     with open(over_doc, 'r', encoding='utf-8') as f:
         over_cont = f.read()
     with st.expander('Overview'):
         st.markdown(over_cont)
 
     # Description & Quick Start
-    quick_start = os.path.join(cwd, '..', 'desc', 'quick_start.md')
+    quick_start = os.path.join(cwd, 'desc', 'quick_start.md')
     with open(quick_start, 'r', encoding='utf-8') as f:
         readme_content = f.read()
     with st.expander('Quick Start Guide'):  
@@ -194,7 +231,7 @@ elif option == "About":
     # LLM & RAG description
     #st.write("-------------------")
     #st.write("## Interactive News Analyst \n ### (LLM Retrieval-Augmented Generation)")
-    llm_desc = os.path.join(cwd, '..', 'desc', 'llm_rag_desc.md')
+    llm_desc = os.path.join(cwd, 'desc', 'llm_rag_desc.md')
     with open(llm_desc, 'r', encoding='utf-8') as f:
         llm_desc_cont = f.read()
     with st.expander('LLM Retrieval-Augmented Generation'): 
@@ -205,7 +242,7 @@ elif option == "About":
     #st.write("-------------------")
     #st.write("## Data Engineering")
     #st.image(os.path.join(images, 'LLM_diagram.png'))
-    de_desc = os.path.join(cwd, '..', 'desc', 'data_engineering.md')
+    de_desc = os.path.join(cwd, 'desc', 'data_engineering.md')
     with open(de_desc, 'r', encoding='utf-8') as f:
         de_desc_cont = f.read()
     with st.expander('Data Engineering'):
@@ -215,7 +252,7 @@ elif option == "About":
     #st.write("-------------------")
     #st.write("## Forecasting")
     #st.image(os.path.join(images, 'LLM_diagram.png'))
-    pred_desc = os.path.join(cwd, '..', 'desc', 'pred_forecast_desc.md')
+    pred_desc = os.path.join(cwd, 'desc', 'pred_forecast_desc.md')
     with open(pred_desc, 'r', encoding='utf-8') as f:
         pred_desc_cont = f.read()
     with st.expander('Forecasting'):
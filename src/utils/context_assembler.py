@@ -0,0 +1,144 @@
+import re
+import logging
+import tiktoken
+from typing import Dict, List, Optional, Sequence
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import Document, BaseDocumentCompressor
+
+# Sentence boundaries: terminal punctuation followed by whitespace
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+# Separates non-adjacent chunks of the same article in a merged document
+GAP_MARKER = '\n...\n'
+
+
+class ContextAssembler(BaseDocumentCompressor):
+    '''Document compressor that assembles retrieved chunks into a compact prompt context.
+
+        Adjacent chunks of the same article are merged back together (dropping the
+        overlap the text splitter duplicated), repeated sentences are removed, and
+        the result is cut to a token budget in retrieval rank order.
+    '''
+
+    token_budget: int = 1500
+    chunk_overlap: int = 200
+    min_overlap: int = 10
+    model_name: str = 'gpt-3.5-turbo'
+    index_chunk_overlap: Optional[int] = None
+
+
+    def model_post_init(self, __context) -> None:
+        if self.index_chunk_overlap is not None and self.index_chunk_overlap != self.chunk_overlap:
+            logging.getLogger(self.__class__.__name__).warning(
+                f"Configured chunk_overlap ({self.chunk_overlap}) differs from the {self.index_chunk_overlap} "
+                "the loaded index was built with; rebuild the index for adjacent chunks to merge cleanly."
+            )
+
+
+    def _token_counter(self):
+        '''Token counter for the target model, falling back to a character estimate
+            when the tiktoken vocabulary cannot be loaded (e.g. on offline hosts)
+        '''
+
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(self.model_name)
+            except KeyError:
+                encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            return lambda text: max(1, len(text) // 4)
+        return lambda text: len(encoding.encode(text))
+
+
+    @staticmethod
+    def _overlap_length(left: str, right: str, max_overlap: int, min_overlap: int) -> int:
+        '''Length of the longest suffix of left that is also a prefix of right.
+
+            Matches shorter than min_overlap, or that start or end mid-word, are ignored
+            so that chunks which do not really overlap are never fused together.
+        '''
+
+        for size in range(min(max_overlap, len(left), len(right)), max(min_overlap, 1) - 1, -1):
+            starts_on_word = size == len(left) or left[-size - 1].isspace()
+            ends_on_word = size == len(right) or right[size].isspace() or right[size - 1].isspace()
+            if starts_on_word and ends_on_word and left.endswith(right[:size]):
+                return size
+        return 0
+
+
+    def merge_adjacent(self, documents: Sequence[Document]) -> List[Document]:
+        '''Merge consecutive chunks from the same article into a single document.
+
+            Documents keep the rank of their best-ranked chunk.
+        '''
+
+        groups: Dict[str, List[Document]] = {}
+        for doc in documents:
+            groups.setdefault(doc.metadata.get('url', id(doc)), []).append(doc)
+
+        merged = []
+        for rank, chunks in enumerate(groups.values()):
+            chunks = sorted(chunks, key=lambda d: d.metadata.get('chunk_index', 0))
+            text = chunks[0].page_content
+            indices = [chunks[0].metadata.get('chunk_index', 0)]
+
+            for prev, chunk in zip(chunks, chunks[1:]):
+                prev_index = prev.metadata.get('chunk_index', 0)
+                chunk_index = chunk.metadata.get('chunk_index', 0)
+                if chunk_index == prev_index:
+                    continue
+                if chunk_index == prev_index + 1:
+                    overlap = self._overlap_length(text, chunk.page_content, self.chunk_overlap, self.min_overlap)
+                    text += chunk.page_content[overlap:] if overlap else ' ' + chunk.page_content
+                else:
+                    text += GAP_MARKER + chunk.page_content
+                indices.append(chunk_index)
+
+            metadata = {**chunks[0].metadata, 'chunk_index': indices}
+            merged.append((rank, Document(page_content=text, metadata=metadata)))
+
+        return [doc for _, doc in sorted(merged, key=lambda x: x[0])]
+
+
+    def compress_documents(self, documents: Sequence[Document], query: str,
+                           callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        '''Merge, deduplicate and budget the retrieved documents for the prompt
+        '''
+
+        count_tokens = self._token_counter()
+        seen = set()
+        used_tokens = 0
+        assembled = []
+
+        for doc in self.merge_adjacent(documents):
+            segments = []
+            exhausted = False
+            # Deduplicate within each run of adjacent chunks so gap markers are never dropped as repeats
+            for segment in doc.page_content.split(GAP_MARKER):
+                kept = []
+                for sentence in SENTENCE_SPLIT.split(segment):
+                    key = ' '.join(sentence.lower().split())
+                    if not key or key in seen:
+                        continue
+                    tokens = count_tokens(sentence)
+                    if used_tokens + tokens > self.token_budget:
+                        exhausted = True
+                        break
+                    seen.add(key)
+                    kept.append(sentence)
+                    used_tokens += tokens
+
+                if kept:
+                    segments.append(' '.join(kept))
+                if exhausted:
+                    break
+
+            if segments:
+                assembled.append(Document(page_content=GAP_MARKER.join(segments), metadata=doc.metadata))
+            if exhausted:
+                # Lower-ranked articles are dropped once the budget is spent
+                break
+
+        logging.getLogger(self.__class__.__name__).info(
+            f"Assembled {len(documents)} chunks into {len(assembled)} passages ({used_tokens} tokens)."
+        )
+        return assembled
@@ -0,0 +1,24 @@
+import pandas as pd
+from datetime import datetime
+
+
+def derive_dashboard_frame(df: pd.DataFrame, population_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive the map/chart frame shown on the Infection Cases & Rates tab.
+
+    Args:
+        df (pd.DataFrame): FluView records as saved by FluDataHandler.
+        population_df (pd.DataFrame): Census population counts by state.
+
+    Returns:
+        pd.DataFrame: Records joined to population with infection rates and week start dates.
+    """
+    df = df.merge(population_df, left_on='region', right_on='state_abbreviation', how='left')
+    df['infection_rate'] = (df['num_ili'].astype(float) / df['Pop.2023'].astype(float)) * 100000  # Infection rate per 100,000 people
+
+    # Convert epiweek to a start date of the week
+    df['year'] = df['epiweek'].astype(str).str[:4].astype(int)
+    df['week'] = df['epiweek'].astype(str).str[4:].astype(int)
+    df['date'] = df.apply(lambda x: datetime.strptime(f"{x['year']}-W{x['week']}-1", "%Y-W%W-%w"), axis=1)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df
@@ -3,9 +3,11 @@ from datetime import datetime, timedelta
 import pandas as pd
 import glob
 import os
+import json
 import yaml
 import logging
 from typing import List, Dict, Any
+from metrics import metrics
 
 
 class FluDataHandler:
@@ -53,9 +55,14 @@ class FluDataHandler:
         ]
         all_locations = regions + states
 
-        res = Epidata.fluview(all_locations, Epidata.range(start_epiweek, end_epiweek))
+        with metrics.span('fluview_fetch'):
+            res = Epidata.fluview(all_locations, Epidata.range(start_epiweek, end_epiweek))
+
+        # The Epidata client returns parsed JSON, so the payload size is approximated by re-serialising it
+        metrics.increment('bytes_fetched', len(json.dumps(res).encode('utf-8')))
 
         if res['result'] == 1:
+            metrics.increment('fluview_records', len(res['epidata']))
             logging.info(f"Success: Retrieved {len(res['epidata'])} records.")
             return res['epidata']
         else:
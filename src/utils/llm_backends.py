@@ -0,0 +1,135 @@
+import re
+import zlib
+import numpy as np
+from typing import Any, Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import SimpleChatModel
+from langchain_core.messages import BaseMessage
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+# The stuff chain's system prompt puts its instructions above this line and the documents below it
+CONTEXT_DELIMITER = '----------------'
+
+
+class HashedEmbeddings(Embeddings):
+    '''Local CPU embeddings: hashed term frequencies reduced by a fixed random projection.
+
+        Tokens (words and word bigrams) are hashed into n_features buckets with a
+        sublinear term weight, projected to dim dimensions with a seeded Gaussian
+        matrix, and L2-normalised. No network access or model download is needed and
+        the same text always maps to the same vector.
+    '''
+
+    def __init__(self, dim: int = 384, n_features: int = 2 ** 14, seed: int = 0, batch_size: int = 256):
+        self.dim = dim
+        self.n_features = n_features
+        self.seed = seed
+        self.batch_size = batch_size
+        self._projection = None
+
+
+    def _get_projection(self) -> np.ndarray:
+        if self._projection is None:
+            rng = np.random.default_rng(self.seed)
+            self._projection = (rng.standard_normal((self.n_features, self.dim)) / np.sqrt(self.dim)).astype(np.float32)
+        return self._projection
+
+
+    def _hash_tokens(self, text: str) -> Dict[int, float]:
+        words = TOKEN_PATTERN.findall(text.lower())
+        terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+        counts: Dict[int, float] = {}
+        for term in terms:
+            bucket = zlib.crc32(term.encode('utf-8')) % self.n_features
+            counts[bucket] = counts.get(bucket, 0.0) + 1.0
+        return counts
+
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        projection = self._get_projection()
+        vectors = []
+
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            out = np.zeros((len(batch), self.dim), dtype=np.float32)
+            for row, text in enumerate(batch):
+                counts = self._hash_tokens(text)
+                if not counts:
+                    continue
+                buckets = np.fromiter(counts.keys(), dtype=np.int64)
+                weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32))
+                out[row] = weights @ projection[buckets]
+
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.where(norms == 0, 1.0, norms)
+            vectors.extend(out.tolist())
+
+        return vectors
+
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts))
+
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+
+class ExtractiveChatModel(SimpleChatModel):
+    '''Deterministic local stand-in for the chat LLM.
+
+        Answers with the sentences of the retrieved documents (the part of the
+        prompt below the stuff chain's delimiter) that share the most words with
+        the question, in their original order, so the retrieval path can be exercised
+        and timed without an API call.
+    '''
+
+    max_sentences: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return 'local-extractive'
+
+
+    def _call(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+              run_manager: Optional[Any] = None, **kwargs: Any) -> str:
+        # The stuff chain sends the retrieved context first and the question last
+        context = '\n\n'.join(str(message.content).split(CONTEXT_DELIMITER, 1)[-1] for message in messages[:-1])
+        question = str(messages[-1].content)
+        question_words = set(TOKEN_PATTERN.findall(question.lower()))
+
+        # Documents are separated by blank lines; keep sentences from running across them
+        sentences = [s.strip() for passage in context.split('\n\n') for s in SENTENCE_SPLIT.split(passage) if s.strip()]
+        scored = [(len(question_words & set(TOKEN_PATTERN.findall(s.lower()))), -i, s) for i, s in enumerate(sentences)]
+        best = sorted(scored, reverse=True)[:self.max_sentences]
+
+        if not best or best[0][0] == 0:
+            return "I don't know."
+        return ' '.join(s for _, _, s in sorted(best, key=lambda x: -x[1]))
+
+
+def get_embeddings(backend_cfg: dict, api_key: Optional[str] = None) -> Embeddings:
+    '''Build the embedding backend named in the backend config
+    '''
+
+    name = backend_cfg.get('embeddings', 'openai')
+    if name == 'openai':
+        return OpenAIEmbeddings(api_key=api_key, model="text-embedding-3-small")
+    if name == 'local':
+        return HashedEmbeddings(**(backend_cfg.get('local_embeddings') or {}))
+    raise ValueError(f"Unknown embeddings backend: {name}")
+
+
+def get_llm(backend_cfg: dict, api_key: Optional[str] = None):
+    '''Build the chat model backend named in the backend config
+    '''
+
+    name = backend_cfg.get('llm', 'openai')
+    if name == 'openai':
+        return ChatOpenAI(api_key=api_key, model_name='gpt-3.5-turbo', temperature=0.5)
+    if name == 'local':
+        return ExtractiveChatModel(**(backend_cfg.get('local_llm') or {}))
+    raise ValueError(f"Unknown LLM backend: {name}")
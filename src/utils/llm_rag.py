@@ -1,26 +1,44 @@
 import os
+import sys
 import yaml
 import glob
 import re
 import shutil
 import json
+import argparse
 import faiss
+import numpy as np
+from datetime import datetime
 from dotenv import load_dotenv
 import logging
-from langchain_core.documents import Document
+from typing import List, Optional
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain.vectorstores import FAISS
 from langchain.chains import RetrievalQA
-from langchain_openai import ChatOpenAI
+from langchain.retrievers import ContextualCompressionRetriever
+from langchain_community.callbacks import get_openai_callback
 from news_scraper import NewsScraper
+from context_assembler import ContextAssembler
+from llm_backends import get_embeddings, get_llm
+from metrics import metrics
 
 # Set resource paths
+# (normalised so the '..' hops past the file name also resolve on POSIX)
 cwd = os.path.abspath(__file__)
-cfg_path = os.path.join(cwd, '..', '..', '..', 'cfg', 'oai.yaml')
-cfg_news_path = os.path.join(cwd, '..', '..', '..', 'cfg', 'newsapi.yaml')
-data_tmp = os.path.join(cwd, '..', '..', '..', 'data', 'tmp')
+cfg_path = os.path.normpath(os.path.join(cwd, '..', '..', '..', 'cfg', 'oai.yaml'))
+backend_cfg_path = os.path.normpath(os.path.join(cwd, '..', '..', '..', 'cfg', 'backend.yaml'))
+cfg_news_path = os.path.normpath(os.path.join(cwd, '..', '..', '..', 'cfg', 'newsapi.yaml'))
+data_tmp = os.path.normpath(os.path.join(cwd, '..', '..', '..', 'data', 'tmp'))
+
+# Retrieval defaults, overridden by the optional 'retrieval' section of backend.yaml
+RETRIEVAL_DEFAULTS = {
+    'k': 4,
+    'chunk_size': 1000,
+    'chunk_overlap': 200,
+    'token_budget': 1500,
+}
+INDEX_SETTINGS_FILE = 'build_settings.json'
 
 # Define LLM RAG Class Object
 class LLMRag():
@@ -28,20 +46,51 @@ class LLMRag():
         query the database, and interact with the LLM model.
 
     '''
-    def __init__(self):
+    def __init__(self, data_dir: str = data_tmp, backend_cfg: Optional[dict] = None):
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(self.__class__.__name__)
-        self._openai_api_key = self._load_api_key()
-        self._faiss_index_path = os.path.join(data_tmp, "faiss_index")
+        self._data_tmp = data_dir
+        self._backend_cfg = backend_cfg if backend_cfg is not None else self._load_backend_config()
+        self._config = self._load_config()
+        self._openai_api_key = self._load_api_key() if self._uses_openai() else None
+        self._retrieval_cfg = {**RETRIEVAL_DEFAULTS, **(self._backend_cfg.get('retrieval') or {})}
+        # Indexes are only valid for the embedding backend that built them
+        index_suffix = '' if self._backend_cfg.get('embeddings', 'openai') == 'openai' else '_' + self._backend_cfg['embeddings']
+        self._faiss_index_path = os.path.join(self._data_tmp, "faiss_index" + index_suffix)
         self._db = None
+        self._index_settings = {}
+        self.retrieval_qa_chain = None
 
 
-    def _load_api_key(self):
+    def _load_backend_config(self) -> dict:
+        '''Load the non-secret settings: embedding/LLM backend selection (defaulting
+            to OpenAI for both) and retrieval tuning
+        '''
+
+        if not os.path.exists(backend_cfg_path):
+            return {}
+        with open(backend_cfg_path, 'rb') as file:
+            return yaml.full_load(file) or {}
+
+
+    def _uses_openai(self) -> bool:
+        return 'openai' in (self._backend_cfg.get('embeddings', 'openai'), self._backend_cfg.get('llm', 'openai'))
+
+
+    def _load_config(self) -> dict:
         try:
             with open(cfg_path, 'rb') as file:
-                return yaml.full_load(file)['key']
+                return yaml.full_load(file) or {}
         except FileNotFoundError:
+            # Fully local backends run without an OpenAI key file
+            if not self._uses_openai():
+                return {}
             raise FileNotFoundError(f"Configuration file not found at {cfg_path}.")
+
+
+    def _load_api_key(self):
+        try:
+            return self._config['key']
         except KeyError:
             raise KeyError("The configuration file is missing the 'key' field.")
 
@@ -50,22 +99,23 @@ class LLMRag():
         '''Load the most recent data file
         '''
 
-        avail_data = glob.glob(r'covid_hosp*.json', root_dir = data_tmp)
+        avail_data = glob.glob(r'covid_hosp*.json', root_dir = self._data_tmp)
+        if not avail_data:
+            raise FileNotFoundError(f"No COVID hospitalization data files found in {self._data_tmp}. "
+                                    "Scrape news first (llm_rag.py --update, or Refresh Data in the app).")
+
         data_dates = [re.search(r'\d{4}-\d{2}-\d{2}', x).group() for x in avail_data]
         max_date = max(data_dates)
         ind = data_dates.index(max_date)
         most_recent = avail_data[ind]
 
-        if not most_recent:
-            raise FileNotFoundError("No COVID hospitalization data files found.")
-        
         self._most_recent = most_recent
         self.logger.info(f"Most recent file: {most_recent}")
         return most_recent
     
 
     def _initialize_embeddings(self):
-        return OpenAIEmbeddings(api_key=self._openai_api_key, model="text-embedding-3-small")
+        return get_embeddings(self._backend_cfg, api_key=self._openai_api_key)
 
 
     def _initialize_faiss(self):
@@ -85,7 +135,7 @@ class LLMRag():
 
         # Load most recent data file
         most_recent = self._most_recent_data()
-        with open(os.path.join(data_tmp, most_recent), 'r', encoding='utf-8') as f:
+        with open(os.path.join(self._data_tmp, most_recent), 'r', encoding='utf-8') as f:
             documents = json.load(f)
 
         # Initialize the vectorstore
@@ -93,42 +143,50 @@ class LLMRag():
 
         # Initialize the text splitter
         text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,  # Maximum characters per chunk
-            chunk_overlap=200  # Overlap between chunks for better context preservation
+            chunk_size=self._retrieval_cfg['chunk_size'],  # Maximum characters per chunk
+            chunk_overlap=self._retrieval_cfg['chunk_overlap']  # Overlap between chunks for better context preservation
         )
 
         # Process each document, split into chunks, embed, and store in FAISS
-        vs_docs = []
+        texts = []
+        metadatas = []
         ids = []
         id_counter = 0  # Unique ID counter for all chunks
 
-        for doc in documents:
-            text = doc["content"]  # Assuming 'content' holds the main text
-            metadata = {"title": doc["title"], "url": doc["url"]}
-
-            # Split the document into chunks
-            chunks = text_splitter.split_text(text)
-
-            # Create Document objects for each chunk with metadata
-            for chunk_index, chunk in enumerate(chunks):
-                vs_doc = Document(
-                    page_content=chunk,
-                    metadata={**metadata, "chunk_index": chunk_index}
-                )
-                vs_docs.append(vs_doc)
-                ids.append(id_counter)
-                id_counter += 1
-
-        # Add all chunked documents to the FAISS vector store
-        db.add_documents(vs_docs, ids=ids)
-
-        # Save the updated FAISS index
-        if os.path.exists(self._faiss_index_path):
-            # Remove if it already exists
-            shutil.rmtree(self._faiss_index_path)
-
-        # Save
-        db.save_local(self._faiss_index_path)
+        with metrics.span('vectordb_split'):
+            for doc in documents:
+                text = doc["content"]  # Assuming 'content' holds the main text
+                metadata = {"title": doc["title"], "url": doc["url"]}
+
+                # Split the document into chunks
+                chunks = text_splitter.split_text(text)
+
+                # Keep chunk text and metadata for each chunk
+                for chunk_index, chunk in enumerate(chunks):
+                    texts.append(chunk)
+                    metadatas.append({**metadata, "chunk_index": chunk_index})
+                    ids.append(id_counter)
+                    id_counter += 1
+
+        # Embed all chunks, then add them to the FAISS vector store
+        with metrics.span('vectordb_embed'):
+            vectors = db.embedding_function.embed_documents(texts)
+        metrics.increment('chunks_embedded', len(texts))
+
+        with metrics.span('vectordb_add'):
+            db.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+
+        with metrics.span('vectordb_save'):
+            # Save the updated FAISS index
+            if os.path.exists(self._faiss_index_path):
+                # Remove if it already exists
+                shutil.rmtree(self._faiss_index_path)
+
+            # Save, recording the chunking the index was built with
+            db.save_local(self._faiss_index_path)
+            self._index_settings = {key: self._retrieval_cfg[key] for key in ('chunk_size', 'chunk_overlap')}
+            with open(os.path.join(self._faiss_index_path, INDEX_SETTINGS_FILE), 'w', encoding='utf-8') as f:
+                json.dump(self._index_settings, f)
         self._db = db
 
 
@@ -137,13 +195,14 @@ class LLMRag():
         '''
 
         # Scrape new data
-        ns = NewsScraper(config_path=cfg_news_path, data_tmp= data_tmp)
+        ns = NewsScraper(config_path=cfg_news_path, data_tmp= self._data_tmp)
         ns.fetch_and_save_articles()
 
         # Update the vector db
         self._create_vectordb()
 
 
+    @metrics.timed('vectordb_load')
     def _load_vectordb(self):
         ''' If vectordb was not updated, load the existing
         '''
@@ -153,6 +212,10 @@ class LLMRag():
         elif os.path.exists(self._faiss_index_path):
             embeddings = self._initialize_embeddings()
             self._db = FAISS.load_local(self._faiss_index_path, embeddings, allow_dangerous_deserialization=True)
+            settings_path = os.path.join(self._faiss_index_path, INDEX_SETTINGS_FILE)
+            if os.path.exists(settings_path):
+                with open(settings_path, 'r', encoding='utf-8') as f:
+                    self._index_settings = json.load(f)
 
 
     def prep_retrieval(self):
@@ -162,23 +225,171 @@ class LLMRag():
         # Will load data if it wasn't already updated and loaded
         self._load_vectordb()
 
-        # Build retrieval chain
-        retriever = self._db.as_retriever()
-        llm = ChatOpenAI(api_key = self._openai_api_key, model_name='gpt-3.5-turbo', temperature=0.5)
+        # No index for this embedding backend yet: build one from the latest scraped
+        # articles (raises FileNotFoundError if there are none)
+        if self._db is None:
+            self.logger.info(f"No vector database at {self._faiss_index_path}; building it.")
+            self._create_vectordb()
+
+        # Build retrieval chain; retrieved chunks are merged, deduplicated and
+        # trimmed to the token budget before they are stuffed into the prompt
+        base_retriever = self._db.as_retriever(search_kwargs={'k': self._retrieval_cfg['k']})
+        self._assembler = ContextAssembler(token_budget=self._retrieval_cfg['token_budget'],
+                                           chunk_overlap=self._retrieval_cfg['chunk_overlap'],
+                                           index_chunk_overlap=self._index_settings.get('chunk_overlap'),
+                                           model_name='gpt-3.5-turbo')
+        retriever = ContextualCompressionRetriever(base_compressor=self._assembler, base_retriever=base_retriever)
+        llm = get_llm(self._backend_cfg, api_key=self._openai_api_key)
         self.retrieval_qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever, return_source_documents=True)
 
 
+    def _require_retrieval(self) -> None:
+        if self.retrieval_qa_chain is None:
+            raise RuntimeError("Retrieval is not prepared; call prep_retrieval() before running queries.")
+
+
     def run_query(self, query : str) -> dict:
         """Runs the given query using the provided retrieval QA chain."""
-        result = self.retrieval_qa_chain.invoke(query)
+        self._require_retrieval()
+        with metrics.span('run_query'), get_openai_callback() as cb:
+            result = self.retrieval_qa_chain.invoke(query)
+
+        metrics.increment('prompt_tokens', cb.prompt_tokens)
+        metrics.increment('completion_tokens', cb.completion_tokens)
+        metrics.increment('tokens_used', cb.total_tokens)
 
         return result
 
 
+    def run_batch(self, queries: List[str], max_concurrency: int = 8) -> List[dict]:
+        """Runs many queries with one embedding request, one FAISS search and concurrent completions.
+
+        Source chunks shared between queries are fetched and assembled once. Results have the
+        same 'query', 'result' and 'source_documents' keys as run_query. A question whose completion
+        fails (e.g. on a rate limit or timeout) gets result None and an 'error' message instead of
+        failing the whole batch.
+        """
+        self._require_retrieval()
+        if not queries:
+            return []
+
+        with metrics.span('batch_embed'):
+            vectors = np.asarray(self._db.embedding_function.embed_documents(list(queries)), dtype=np.float32)
+
+        with metrics.span('batch_search'):
+            _, positions = self._db.index.search(vectors, self._retrieval_cfg['k'])
+
+        # Fetch each distinct chunk once, however many queries retrieved it
+        unique = {int(p) for p in positions.ravel() if p >= 0}
+        chunks = {p: self._db.docstore.search(self._db.index_to_docstore_id[p]) for p in unique}
+        metrics.increment('batch_chunks_retrieved', int((positions >= 0).sum()))
+        metrics.increment('batch_chunks_unique', len(unique))
+
+        # Queries that retrieved the same chunks share one assembled context
+        contexts = {}
+        inputs = []
+        for query, row in zip(queries, positions):
+            key = tuple(int(p) for p in row if p >= 0)
+            if key not in contexts:
+                contexts[key] = self._assembler.compress_documents([chunks[p] for p in key], query)
+            inputs.append({'input_documents': contexts[key], 'question': query})
+
+        with metrics.span('batch_complete'), get_openai_callback() as cb:
+            outputs = self.retrieval_qa_chain.combine_documents_chain.batch(
+                inputs, config={'max_concurrency': max_concurrency}, return_exceptions=True
+            )
+
+        metrics.increment('batch_queries', len(queries))
+        metrics.increment('prompt_tokens', cb.prompt_tokens)
+        metrics.increment('completion_tokens', cb.completion_tokens)
+        metrics.increment('tokens_used', cb.total_tokens)
+
+        results = []
+        for i, o in zip(inputs, outputs):
+            result = {'query': i['question'], 'source_documents': i['input_documents']}
+            if isinstance(o, Exception):
+                result.update({'result': None, 'error': f"{type(o).__name__}: {o}"})
+            else:
+                result['result'] = o['output_text']
+            results.append(result)
+
+        failed = sum('error' in r for r in results)
+        if failed:
+            metrics.increment('batch_queries_failed', failed)
+            self.logger.warning(f"{failed} of {len(queries)} batch queries failed.")
+        return results
+
+
+def load_batch_queries(path: str) -> List[dict]:
+    '''Load batch questions, one per line: a JSON object with a 'query' field (other fields are kept),
+        or the plain question text. JSON lines are detected by parsing, whatever the file extension.
+    '''
+
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            records.append(record if isinstance(record, dict) and 'query' in record else {'query': line})
+    return records
+
+
+def save_batch_results(records: List[dict], results: List[dict], path: str) -> str:
+    '''Save batch results to JSONL, one line per question with its input fields, answer and sources,
+        plus an 'error' field for questions that failed
+    '''
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for record, result in zip(records, results):
+            line = {
+                **record,
+                'result': result['result'],
+                'source_documents': [
+                    {'page_content': doc.page_content, 'metadata': doc.metadata}
+                    for doc in result['source_documents']
+                ],
+            }
+            if result.get('error'):
+                line['error'] = result['error']
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+    return path
+
+
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser(description='Query the COVID news analyst.')
+    parser.add_argument('query', nargs='?', default='is covid getting better in the USA?')
+    parser.add_argument('--update', action='store_true', help='Scrape news and rebuild the vector database first.')
+    parser.add_argument('--batch', help='Questions file: one JSON object with a "query" field, or one question, per line.')
+    parser.add_argument('--output', help='JSONL results path for --batch.')
+    parser.add_argument('--max-concurrency', type=int, default=8, help='Maximum concurrent completions.')
+    parser.add_argument('--metrics', help='Export pipeline metrics on exit (.prom for Prometheus text, else JSON); '
+                                          'defaults to PIPELINE_METRICS.')
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.export_to(args.metrics)
+
     test = LLMRag()
-    test.update_vectordb() # Optional
-    test.prep_retrieval()
-    output = test.run_query('is covid getting better in the USA?')
-    print(output)
\ No newline at end of file
+    if args.update:
+        test.update_vectordb()
+    try:
+        test.prep_retrieval()
+    except FileNotFoundError as e:
+        sys.exit(f"Cannot prepare the news analyst: {e}")
+
+    if args.batch:
+        records = load_batch_queries(args.batch)
+        results = test.run_batch([r['query'] for r in records], max_concurrency=args.max_concurrency)
+        output_path = args.output or os.path.join(
+            test._data_tmp, f"news_analyst_batch_{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+        )
+        print(f"Batch results saved to: {save_batch_results(records, results, output_path)}")
+    else:
+        output = test.run_query(args.query)
+        print(output)
@@ -0,0 +1,181 @@
+import os
+import json
+import atexit
+import time
+import cProfile
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+
+class PipelineMetrics:
+    """Lightweight per-stage timing spans and counters for the data and LLM pipelines.
+
+    Spans record call count, total and max wall-clock seconds per stage; counters accumulate
+    totals such as bytes fetched or tokens used. Both can be exported in Prometheus text
+    format or as JSON. Stages listed in the PIPELINE_PROFILE environment variable (comma
+    separated, or 'all') are additionally run under cProfile, with stats written to
+    PIPELINE_PROFILE_DIR as <stage>.prof when metrics are exported or the process exits.
+    If PIPELINE_METRICS is set to a file path, spans and counters are exported there by
+    flush(), which runs at process exit and after each data refresh in the app.
+    """
+
+    def __init__(self, prefix: str = 'llm_infection'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._spans: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, float] = {}
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._profiling = False
+        self._profile_stages = {s.strip() for s in os.environ.get('PIPELINE_PROFILE', '').split(',') if s.strip()}
+        self._profile_dir = os.environ.get('PIPELINE_PROFILE_DIR', os.getcwd())
+        # Resolved now as some entry points change directory before exiting
+        self._metrics_path = os.path.abspath(os.environ['PIPELINE_METRICS']) if os.environ.get('PIPELINE_METRICS') else None
+        atexit.register(self.flush)
+
+
+    def enable_profiling(self, stages: Iterable[str], output_dir: Optional[str] = None) -> None:
+        """
+        Run the given stages under cProfile.
+
+        Args:
+            stages (Iterable[str]): Stage names to profile, or ['all'].
+            output_dir (Optional[str]): Directory for the <stage>.prof files.
+        """
+        self._profile_stages = set(stages)
+        if output_dir:
+            self._profile_dir = output_dir
+
+
+    def _should_profile(self, name: str) -> bool:
+        return not self._profiling and ('all' in self._profile_stages or name in self._profile_stages)
+
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block as one call of the named stage."""
+        profiler = None
+        if self._should_profile(name):
+            # Only one cProfile profiler can be active at a time, so nested spans are not profiled
+            profiler = self._profiles.setdefault(name, cProfile.Profile())
+            self._profiling = True
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+
+            with self._lock:
+                span = self._spans.setdefault(name, {'count': 0, 'seconds_total': 0.0, 'seconds_max': 0.0})
+                span['count'] += 1
+                span['seconds_total'] += seconds
+                span['seconds_max'] = max(span['seconds_max'], seconds)
+
+
+    def timed(self, name: str):
+        """Decorator form of span()."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+    def dump_profiles(self) -> None:
+        """Write the accumulated cProfile stats of each profiled stage to <stage>.prof."""
+        if not self._profiles:
+            return
+        os.makedirs(self._profile_dir, exist_ok=True)
+        for name, profiler in self._profiles.items():
+            profiler.dump_stats(os.path.join(self._profile_dir, f"{name}.prof"))
+
+
+    def export_to(self, path: Optional[str]) -> None:
+        """Set the file flush() exports metrics to; None disables the export."""
+        self._metrics_path = os.path.abspath(path) if path else None
+
+
+    def flush(self) -> None:
+        """Export metrics to the configured PIPELINE_METRICS path, if any, and write cProfile stats."""
+        if self._metrics_path:
+            self.export(self._metrics_path)
+        else:
+            self.dump_profiles()
+
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add value to the named counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+
+    def snapshot(self) -> dict:
+        """
+        Return a copy of all spans and counters.
+
+        Returns:
+            dict: {'spans': {stage: {count, seconds_total, seconds_max}}, 'counters': {name: value}}
+        """
+        with self._lock:
+            return {
+                'spans': {name: dict(span) for name, span in self._spans.items()},
+                'counters': dict(self._counters),
+            }
+
+
+    def to_prometheus(self) -> str:
+        """Render spans and counters in the Prometheus text exposition format."""
+        data = self.snapshot()
+        lines = []
+
+        if data['spans']:
+            for metric, key, kind in (('stage_calls_total', 'count', 'counter'),
+                                      ('stage_seconds_total', 'seconds_total', 'counter'),
+                                      ('stage_seconds_max', 'seconds_max', 'gauge')):
+                lines.append(f"# TYPE {self.prefix}_{metric} {kind}")
+                for name, span in sorted(data['spans'].items()):
+                    lines.append(f'{self.prefix}_{metric}{{stage="{name}"}} {span[key]}')
+
+        for name, value in sorted(data['counters'].items()):
+            lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+            lines.append(f"{self.prefix}_{name}_total {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+    def export(self, path: str) -> str:
+        """
+        Write the metrics to a file; '.prom' and '.txt' paths get Prometheus text, anything else JSON.
+        Any cProfile stats are written out at the same time.
+
+        Args:
+            path (str): Output file path.
+
+        Returns:
+            str: The path written.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            if os.path.splitext(path)[1] in ('.prom', '.txt'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=4)
+        self.dump_profiles()
+        return path
+
+
+# Shared registry used across the pipeline modules
+metrics = PipelineMetrics()
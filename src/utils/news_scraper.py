@@ -6,32 +6,18 @@ import glob
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from typing import Dict, List, Optional
+from metrics import metrics
 
-cwd = os.path.abspath(__file__)
-cfg_path = os.path.join(cwd,'..','..', '..', 'cfg', 'newsapi.yaml')
-data_tmp = os.path.join(cwd, '..', '..', '..', 'data', 'tmp')
-
-with open(cfg_path, 'rb') as cfg_file:
-        api_key = yaml.full_load(cfg_file)['key']
 
 class NewsScraper:
+    NEWSAPI_URL = "https://newsapi.org/v2/everything"
+
     def __init__(self, config_path: str, data_tmp: str):
         self.config_path = config_path
         self.data_tmp = data_tmp
         self.api_key = self._load_api_key()
 
 
-    def _load_api_key(self) -> str:
-        """Load the API key from the YAML configuration file."""
-        try:
-            with open(self.config_path, 'r', encoding='utf-8') as cfg_file:
-                return yaml.safe_load(cfg_file)['key']
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Config file not found: {self.config_path}")
-        except KeyError:
-            raise KeyError("The configuration file is missing the 'key' field.")
-        
-
     def _load_api_key(self) -> str:
         """Load the API key from the YAML configuration file."""
         try:
@@ -48,7 +34,7 @@ class NewsScraper:
         yesterday = datetime.now() - timedelta(days=1)
         last_week = yesterday - timedelta(days=7)
 
-        url = "https://newsapi.org/v2/everything"
+        url = self.NEWSAPI_URL
         params = {
             "q": "covid hospitalization",
             "from": last_week.strftime("%Y-%m-%d"),
@@ -59,7 +45,9 @@ class NewsScraper:
             "page": page,
         }
 
-        response = requests.get(url, params=params)
+        with metrics.span('newsapi_fetch'):
+            response = requests.get(url, params=params)
+        metrics.increment('bytes_fetched', len(response.content))
         if response.status_code == 200:
             articles = response.json().get("articles", [])
             return {article["title"]: article["url"] for article in articles if "title" in article and "url" in article}
@@ -68,14 +56,18 @@ class NewsScraper:
             return {}
 
 
+    @metrics.timed('scrape_article')
     def scrape_article_with_bs4(self, url: str) -> Optional[str]:
         """Scrape the main content of a news article using BeautifulSoup."""
         try:
-            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+            with metrics.span('scrape_fetch'):
+                response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+            metrics.increment('bytes_fetched', len(response.content))
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                paragraphs = soup.find_all('p')
-                return ' '.join(p.get_text() for p in paragraphs)
+                with metrics.span('scrape_parse'):
+                    soup = BeautifulSoup(response.text, 'html.parser')
+                    paragraphs = soup.find_all('p')
+                    return ' '.join(p.get_text() for p in paragraphs)
             else:
                 print(f"Failed to retrieve article. Status code: {response.status_code}")
                 return None
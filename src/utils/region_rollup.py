@@ -0,0 +1,212 @@
+import os
+import yaml
+import logging
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+
+class RegionRollup:
+    """Precomputes HHS/census region and nation-level flu aggregates from FluView records.
+
+    Regions that FluView reports itself (e.g. the census regions CEN1-CEN9 fetched by
+    FluDataHandler) keep FluView's own figures. Regions with no reported total (HHS regions
+    and the nation) are summed from the state rows using the membership lists in
+    cdc_regions.yaml. The 'source' column records which was used.
+    """
+
+    NATION = 'NAT'
+    NATION_NAME = 'NATIONAL'
+    COUNT_COLUMNS = ['num_ili', 'num_patients', 'num_providers']
+
+    # FluView location codes that report a state under a different name
+    FLUVIEW_ALIASES = {'NY_MINUS_JFK': 'NY'}
+
+    # Population not covered by the state feed. NY_MINUS_JFK is New York State excluding
+    # New York City (reported separately by FluView as 'jfk', which is not fetched), so
+    # state-summed rates use New York's population less NYC (2023 census estimate).
+    STATE_FEED_EXCLUSIONS = {'NY': 8258035}
+
+
+    def __init__(self, data_ref: str):
+        self.data_ref = data_ref
+        self.logger = logging.getLogger(__name__)
+        self._population_df = self._load_populations()
+        self.populations = self._population_df.set_index('state_abbreviation')['Pop.2023'].astype(float)
+        self.feed_populations = self.populations.sub(pd.Series(self.STATE_FEED_EXCLUSIONS, dtype=float), fill_value=0)
+        self.region_names, self.region_states = self._load_region_members()
+        self._version = None
+        self._rollup = None
+        self._states = None
+        self._state_codes = set()
+        self._levels = {}
+
+
+    def _load_populations(self) -> pd.DataFrame:
+        """
+        Load census population counts by state.
+
+        Returns:
+            pd.DataFrame: State names, abbreviations and population counts.
+        """
+        try:
+            return pd.read_csv(os.path.join(self.data_ref, 'state_populations.csv'))
+        except FileNotFoundError:
+            self.logger.error("State populations file not found.")
+            raise
+
+
+    def _load_region_members(self) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+        """
+        Load CDC region names and state membership lists from a YAML file.
+
+        Returns:
+            Tuple[Dict[str, str], Dict[str, List[str]]]: Region code to region name, and region code
+                to the abbreviations of its member states.
+        """
+        try:
+            with open(os.path.join(self.data_ref, 'cdc_regions.yaml'), 'r', encoding='utf-8') as file:
+                cdc_regions = yaml.safe_load(file)
+        except FileNotFoundError:
+            self.logger.error("CDC regions file not found.")
+            raise
+        except yaml.YAMLError as e:
+            self.logger.error(f"Error parsing CDC regions YAML file: {e}")
+            raise
+
+        state_abbreviations = dict(zip(self._population_df['Name'], self._population_df['state_abbreviation']))
+
+        region_names = {key.upper(): value['name'].upper() for key, value in cdc_regions.items()}
+        region_states = {}
+        for key, value in cdc_regions.items():
+            members = [state_abbreviations[name] for name in value['states'] if name in state_abbreviations]
+            skipped = [name for name in value['states'] if name not in state_abbreviations]
+            if skipped:
+                self.logger.info(f"Region {key.upper()} has no population data for: {', '.join(skipped)}")
+            region_states[key.upper()] = members
+
+        region_names[self.NATION] = self.NATION_NAME
+        region_states[self.NATION] = list(self.populations.index)
+        return region_names, region_states
+
+
+    @staticmethod
+    def region_level(region: str) -> str:
+        """Return the region level (e.g. 'HHS', 'CEN', 'NAT') for a region code."""
+        return region.rstrip('0123456789')
+
+
+    def build(self, df: pd.DataFrame, version: Optional[str] = None) -> pd.DataFrame:
+        """
+        Aggregate FluView records into region and nation totals per epiweek.
+
+        The rollup and the state drill-down index are only rebuilt when the data version changes.
+
+        Args:
+            df (pd.DataFrame): FluView records as saved by FluDataHandler.
+            version (Optional[str]): Identifier of the data contents (e.g. file name and mtime).
+                If it matches the last build, the cached rollup is returned.
+
+        Returns:
+            pd.DataFrame: One row per region and epiweek with counts, population,
+                population-weighted rates, the number of member states (reporting states
+                for state sums) and the source ('fluview' or 'states').
+        """
+        if version is not None and version == self._version and self._rollup is not None:
+            return self._rollup
+
+        df = df.assign(region=df['region'].str.upper())
+        reported_regions = set(df['region']) & set(self.region_names)
+
+        states = df.assign(state=df['region'].replace(self.FLUVIEW_ALIASES))
+        states = states[states['state'].isin(self.populations.index)]
+        states = states.assign(population=states['state'].map(self.feed_populations))
+
+        rollup = pd.concat(
+            [self._reported_rollup(df[df['region'].isin(reported_regions)]),
+             self._summed_rollup(states, exclude=reported_regions)],
+            ignore_index=True
+        )
+        rollup['infection_rate'] = rollup['num_ili'] / rollup['population'] * 100000
+        rollup['region_name'] = rollup['rollup_region'].map(self.region_names)
+        rollup['level'] = rollup['rollup_region'].map(self.region_level)
+        rollup = rollup.sort_values(['rollup_region', 'epiweek']).reset_index(drop=True)
+
+        self._states = states.set_index(['state', 'epiweek']).sort_index()
+        self._state_codes = set(self._states.index.get_level_values('state'))
+        self._levels = {level: frame.reset_index(drop=True) for level, frame in rollup.groupby('level')}
+        self._rollup = rollup
+        self._version = version
+        self.logger.info(f"Built region rollup: {len(rollup)} rows across {len(self._levels)} levels.")
+        return rollup
+
+
+    def _reported_rollup(self, reported: pd.DataFrame) -> pd.DataFrame:
+        """Region rows as reported by FluView, with the full census population of their member states."""
+        region_populations = {region: self.populations[members].sum() for region, members in self.region_states.items()}
+
+        rollup = reported[['region', 'epiweek'] + self.COUNT_COLUMNS + ['ili', 'wili']].rename(columns={'region': 'rollup_region'})
+        rollup['population'] = rollup['rollup_region'].map(region_populations)
+        rollup['num_states'] = rollup['rollup_region'].map(lambda region: len(self.region_states[region]))
+        rollup['source'] = 'fluview'
+        return rollup
+
+
+    def _summed_rollup(self, states: pd.DataFrame, exclude: set) -> pd.DataFrame:
+        """Sum state rows into every region FluView does not report itself."""
+        # Population only counts towards the weighted ILI where the state reported one
+        states = states.assign(wili_population=states['population'].where(states['wili'].notna(), 0.0))
+        states['wili_weighted'] = states['wili'].fillna(0.0) * states['wili_population']
+
+        membership = pd.DataFrame(
+            [(region, state) for region, members in self.region_states.items() if region not in exclude
+             for state in members],
+            columns=['rollup_region', 'state']
+        )
+        value_columns = self.COUNT_COLUMNS + ['population', 'wili_population', 'wili_weighted']
+        joined = states[['state', 'epiweek'] + value_columns].merge(membership, on='state')
+
+        grouped = joined.groupby(['rollup_region', 'epiweek'], sort=True)
+        rollup = grouped[value_columns].sum()
+        rollup['num_states'] = grouped['state'].nunique()
+        rollup = rollup.reset_index()
+
+        rollup['ili'] = rollup['num_ili'] / rollup['num_patients'] * 100
+        rollup['wili'] = rollup['wili_weighted'] / rollup['wili_population']
+        rollup['source'] = 'states'
+        return rollup.drop(columns=['wili_population', 'wili_weighted'])
+
+
+    def aggregate(self, level: str) -> pd.DataFrame:
+        """
+        Return the precomputed aggregates for one region level.
+
+        Args:
+            level (str): Region level, one of 'HHS', 'CEN' or 'NAT'.
+
+        Returns:
+            pd.DataFrame: Rollup rows for every region of that level.
+        """
+        if not self._levels:
+            raise RuntimeError("Region rollup has not been built.")
+        return self._levels.get(level.upper(), pd.DataFrame())
+
+
+    def drill_down(self, region: str, epiweek: Optional[int] = None) -> pd.DataFrame:
+        """
+        Return the state-level records that make up a region, served from the state/epiweek index.
+
+        Args:
+            region (str): Region code (e.g. 'CEN1', 'HHS4' or 'NAT').
+            epiweek (Optional[int]): Restrict to a single epiweek.
+
+        Returns:
+            pd.DataFrame: State records indexed by state and epiweek; empty if the epiweek is not in the data.
+        """
+        if self._states is None:
+            raise RuntimeError("Region rollup has not been built.")
+
+        members = [state for state in self.region_states[region.upper()] if state in self._state_codes]
+        states = self._states.loc[members]
+        if epiweek is None:
+            return states
+        return states[states.index.get_level_values('epiweek') == epiweek]
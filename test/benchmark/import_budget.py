@@ -0,0 +1,77 @@
+'''Cold-start import budget check for the Streamlit app.
+
+Runs src/streamlit/app.py once in a fresh interpreter (Streamlit bare mode, which
+renders the default About tab), times it, and lists which heavy LLM-stack modules
+were imported. Those should only load when the News Analyst tab is first used.
+
+Usage:
+    python test/benchmark/import_budget.py --budget 3.0
+'''
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Optional
+
+# Set resource paths
+cwd = os.path.dirname(os.path.abspath(__file__))
+app_path = os.path.join(cwd, '..', '..', 'src', 'streamlit', 'app.py')
+
+# Top-level packages that must not be imported on a cold start of the default tab
+DEFERRED_MODULES = ['llm_rag', 'faiss', 'langchain', 'langchain_core', 'langchain_openai',
+                    'langchain_community', 'openai', 'tiktoken', 'delphi_epidata']
+
+_PROBE = '''
+import sys, json, time, runpy
+start = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name='__main__')
+seconds = time.perf_counter() - start
+deferred = set(sys.argv[2].split(','))
+loaded = sorted({name.split('.')[0] for name in sys.modules} & deferred)
+print('IMPORT_BUDGET ' + json.dumps({'seconds': seconds, 'deferred_loaded': loaded}))
+'''
+
+
+def measure_cold_start(app: str = app_path) -> dict:
+    '''Run the app script in a new interpreter and return its start time and any deferred modules it loaded
+    '''
+
+    proc = subprocess.run(
+        [sys.executable, '-c', _PROBE, os.path.abspath(app), ','.join(DEFERRED_MODULES)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(app))
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith('IMPORT_BUDGET '):
+            return json.loads(line[len('IMPORT_BUDGET '):])
+    raise RuntimeError(f"App cold start failed:\n{proc.stderr[-2000:]}")
+
+
+def check_import_budget(budget_seconds: float, app: str = app_path) -> list:
+    '''List budget violations for a cold start of the app; empty if within budget
+    '''
+
+    result = measure_cold_start(app)
+    violations = []
+    if result['seconds'] > budget_seconds:
+        violations.append(f"cold start took {result['seconds']:.2f}s, budget is {budget_seconds:.2f}s")
+    if result['deferred_loaded']:
+        violations.append(f"cold start imported deferred modules: {', '.join(result['deferred_loaded'])}")
+    return violations
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=3.0, help='Maximum cold start time in seconds.')
+    args = parser.parse_args(argv)
+
+    violations = check_import_budget(args.budget)
+    for violation in violations:
+        print(f"IMPORT BUDGET EXCEEDED {violation}")
+    if not violations:
+        print("Cold start within import budget.")
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
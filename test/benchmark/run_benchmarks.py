@@ -0,0 +1,225 @@
+'''End-to-end pipeline benchmarks against local stand-ins for Epidata, NewsAPI and article hosts.
+
+Usage:
+    python test/benchmark/run_benchmarks.py --scale 4 --output benchmark_report.json
+    python test/benchmark/run_benchmarks.py --baseline benchmark_report.json --tolerance 0.25
+
+Each stage is timed and written to a JSON report. With --baseline, the run exits
+non-zero if any stage's throughput drops by more than the tolerance; with
+--import-budget, if the app cold start is too slow or loads the LLM stack.
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+# Set resource paths
+cwd = os.path.dirname(os.path.abspath(__file__))
+utils_dir = os.path.join(cwd, '..', '..', 'src', 'utils')
+data_ref = os.path.join(cwd, '..', '..', 'data', 'ref')
+sys.path.append(utils_dir)
+
+from stand_ins import StandInServer, load_articles, load_fluview_records
+from metrics import metrics
+from import_budget import check_import_budget
+
+# Explicit backend and retrieval settings so reports don't depend on the host's cfg/backend.yaml
+BENCHMARK_BACKEND = {
+    'embeddings': 'local',
+    'llm': 'local',
+    'retrieval': {'k': 4, 'chunk_size': 1000, 'chunk_overlap': 200, 'token_budget': 1500},
+}
+QUERIES = [
+    'is covid getting better in the USA?',
+    'Which states report rising hospitalizations?',
+    'What are hospitals doing about capacity?',
+    'Are flu and covid admissions increasing this week?',
+    'What do health officials recommend?',
+]
+
+
+class StageTimer:
+    '''Collects wall-clock timings and item counts per pipeline stage
+    '''
+
+    def __init__(self):
+        self.stages: Dict[str, dict] = {}
+
+
+    def run(self, name: str, fn: Callable[[], int]):
+        '''Time fn(), which returns the number of items it processed
+        '''
+
+        start = time.perf_counter()
+        items = fn()
+        seconds = time.perf_counter() - start
+        self.stages[name] = {
+            'seconds': round(seconds, 6),
+            'items': items,
+            'items_per_second': round(items / seconds, 3) if seconds > 0 else None,
+        }
+        print(f"{name:<20} {seconds:>10.3f}s {items:>10} items")
+        return items
+
+
+def run_benchmarks(scale: int, queries: int, work_dir: str) -> dict:
+    '''Run every pipeline stage against the stand-ins and return the report
+    '''
+
+    import pandas as pd
+    from delphi_epidata import Epidata
+    from infection_scraper import FluDataHandler
+    from news_scraper import NewsScraper
+    from llm_rag import LLMRag
+    from region_rollup import RegionRollup
+    from dashboard_frames import derive_dashboard_frame
+
+    fluview_records = load_fluview_records(scale)
+    articles = load_articles(scale)
+    timer = StageTimer()
+    state = {}
+
+    newsapi_cfg = os.path.join(work_dir, 'newsapi.yaml')
+    with open(newsapi_cfg, 'w', encoding='utf-8') as f:
+        f.write('key: benchmark\n')
+
+    with StandInServer(fluview_records, articles) as server:
+        Epidata.BASE_URL = f"{server.base_url}/epidata"
+        NewsScraper.NEWSAPI_URL = f"{server.base_url}/v2/everything"
+
+        def fluview_ingest():
+            handler = FluDataHandler(work_dir, work_dir, data_ref)
+            state['fluview_csv'] = handler.process_and_save_flu_data(0, 999999)
+            return len(fluview_records)
+
+        def scrape():
+            scraper = NewsScraper(newsapi_cfg, work_dir)
+            with open(scraper.fetch_and_save_articles(), 'r', encoding='utf-8') as f:
+                return len(json.load(f))
+
+        timer.run('fluview_ingest', fluview_ingest)
+        timer.run('scrape', scrape)
+        bytes_fetched = server.bytes_served
+
+    def dashboard_frames():
+        df = pd.read_csv(state['fluview_csv'])
+        population_df = pd.read_csv(os.path.join(data_ref, 'state_populations.csv'))
+        derive_dashboard_frame(df, population_df)
+        RegionRollup(data_ref).build(df, version=os.path.basename(state['fluview_csv']))
+        return len(df)
+
+    rag = LLMRag(data_dir=work_dir, backend_cfg=BENCHMARK_BACKEND)
+
+    def index():
+        rag._create_vectordb()
+        return rag._db.index.ntotal
+
+    def search():
+        for i in range(queries):
+            rag._db.similarity_search(QUERIES[i % len(QUERIES)])
+        return queries
+
+    def retrieval_qa():
+        for i in range(queries):
+            rag.run_query(QUERIES[i % len(QUERIES)])
+        return queries
+
+    def batch_qa():
+        rag.run_batch([QUERIES[i % len(QUERIES)] for i in range(queries)])
+        return queries
+
+    timer.run('dashboard_frames', dashboard_frames)
+    timer.run('chunk_embed_index', index)
+    timer.run('search', search)
+    # Chain setup is excluded so retrieval_qa and batch_qa both time queries alone
+    rag.prep_retrieval()
+    timer.run('retrieval_qa', retrieval_qa)
+    timer.run('batch_qa', batch_qa)
+
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': scale,
+        'backend': BENCHMARK_BACKEND,
+        'fluview_records': len(fluview_records),
+        'articles': len(articles),
+        'bytes_fetched': bytes_fetched,
+        'stages': timer.stages,
+        'metrics': metrics.snapshot(),
+    }
+
+
+def compare_reports(report: dict, baseline: dict, tolerance: float) -> list:
+    '''List stages whose throughput fell more than tolerance below the baseline
+    '''
+
+    regressions = []
+    for name, stage in report['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if not previous or not previous.get('items_per_second') or not stage.get('items_per_second'):
+            continue
+        ratio = stage['items_per_second'] / previous['items_per_second']
+        if ratio < 1 - tolerance:
+            regressions.append(f"{name}: {stage['items_per_second']} items/s vs "
+                               f"{previous['items_per_second']} baseline ({ratio:.0%})")
+    return regressions
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1, help='Copies of the data/tmp samples to serve.')
+    parser.add_argument('--queries', type=int, default=20, help='Queries per retrieval stage.')
+    parser.add_argument('--output', default='benchmark_report.json', help='Path of the JSON report.')
+    parser.add_argument('--baseline', help='Previous report to check for throughput regressions.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed fractional throughput drop.')
+    parser.add_argument('--import-budget', type=float, help='Fail if the app cold start exceeds this many seconds '
+                                                            'or imports the LLM stack.')
+    parser.add_argument('--metrics', help='Also export pipeline metrics (.prom for Prometheus text, else JSON).')
+    parser.add_argument('--profile', help="Comma-separated pipeline stages to run under cProfile, or 'all'.")
+    parser.add_argument('--keep', action='store_true', help='Keep the working directory.')
+    args = parser.parse_args(argv)
+
+    # Read the baseline first in case it is also the output path
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if args.profile:
+        metrics.enable_profiling(args.profile.split(','), output_dir=os.path.dirname(os.path.abspath(args.output)))
+
+    work_dir = tempfile.mkdtemp(prefix='llm_infection_bench_')
+    try:
+        report = run_benchmarks(args.scale, args.queries, work_dir)
+    finally:
+        if args.keep:
+            print(f"Working directory kept at {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    print(f"Report saved to: {args.output}")
+    if args.metrics:
+        print(f"Metrics saved to: {metrics.export(args.metrics)}")
+
+    failures = []
+    if baseline is not None:
+        failures += [f"REGRESSION {r}" for r in compare_reports(report, baseline, args.tolerance)]
+    if args.import_budget is not None:
+        failures += [f"IMPORT BUDGET EXCEEDED {v}" for v in check_import_budget(args.import_budget)]
+
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import os
+import re
+import csv
+import glob
+import json
+import random
+import threading
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from typing import Any, Dict, List, Optional
+
+# Set resource paths
+cwd = os.path.dirname(os.path.abspath(__file__))
+data_tmp = os.path.join(cwd, '..', '..', 'data', 'tmp')
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+FLUVIEW_NUMERIC = ['issue', 'epiweek', 'lag', 'num_ili', 'num_patients', 'num_providers',
+                   'num_age_0', 'num_age_1', 'num_age_2', 'num_age_3', 'num_age_4', 'num_age_5',
+                   'wili', 'ili']
+
+
+def _latest(pattern: str) -> str:
+    files = glob.glob(os.path.join(data_tmp, pattern))
+    if not files:
+        raise FileNotFoundError(f"No sample data matching {pattern} in {data_tmp}.")
+    return max(files, key=lambda f: re.search(r'\d{4}-\d{2}-\d{2}', f).group())
+
+
+def _number(value: str):
+    if value == '':
+        return None
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def load_fluview_records(scale: int = 1) -> List[Dict[str, Any]]:
+    """
+    Build FluView API records from the saved sample, repeated back in time to reach a synthetic size.
+
+    Args:
+        scale (int): Number of copies of the sample; copy k is shifted k years earlier.
+
+    Returns:
+        List[Dict[str, Any]]: Records shaped like the `epidata` list of an Epidata.fluview response.
+    """
+    with open(_latest('fluview_data_*.csv'), 'r', encoding='utf-8') as f:
+        sample = list(csv.DictReader(f))
+
+    records = []
+    for copy in range(scale):
+        for row in sample:
+            record = {key: value for key, value in row.items() if key != 'region_name'}
+            record['region'] = record['region'].lower()
+            for key in FLUVIEW_NUMERIC:
+                record[key] = _number(record[key])
+            record['epiweek'] -= 100 * copy
+            record['issue'] -= 100 * copy
+            records.append(record)
+    return records
+
+
+def load_articles(scale: int = 1, seed: int = 0) -> List[Dict[str, str]]:
+    """
+    Build synthetic news articles from the saved sample.
+
+    Copies beyond the first have their sentences shuffled so that the chunks they produce are distinct.
+
+    Args:
+        scale (int): Number of copies of the sample.
+        seed (int): Seed for the sentence shuffling.
+
+    Returns:
+        List[Dict[str, str]]: Articles with 'title' and 'content'.
+    """
+    with open(_latest('covid_hospitalization_articles_*.json'), 'r', encoding='utf-8') as f:
+        sample = [doc for doc in json.load(f) if doc.get('content')]
+
+    rng = random.Random(seed)
+    articles = []
+    for copy in range(scale):
+        for doc in sample:
+            sentences = SENTENCE_SPLIT.split(doc['content'])
+            if copy:
+                rng.shuffle(sentences)
+            articles.append({'title': f"{doc['title']} [{len(articles)}]", 'content': ' '.join(sentences)})
+    return articles
+
+
+class StandInServer:
+    """Local HTTP stand-in for the Epidata fluview endpoint, the NewsAPI /v2/everything endpoint and article pages.
+
+    Routes:
+        /epidata/fluview/       -> {'result': 1, 'epidata': [...]} for every requested range
+        /v2/everything?page=N   -> NewsAPI page of 100 articles linking to /articles/<i>
+        /articles/<i>           -> HTML page with the article text in <p> tags
+    """
+
+    def __init__(self, fluview_records: List[Dict[str, Any]], articles: List[Dict[str, str]],
+                 host: str = '127.0.0.1', port: int = 0):
+        self.fluview_records = fluview_records
+        self.articles = articles
+        self.bytes_served = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body: bytes, content_type: str, status: int = 200):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                stand_in.bytes_served += len(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+
+                if url.path.rstrip('/').endswith('/fluview'):
+                    body = {'result': 1, 'epidata': stand_in.fluview_records, 'message': 'success'}
+                    self._send(json.dumps(body).encode('utf-8'), 'application/json')
+
+                elif url.path == '/v2/everything':
+                    page = int(params.get('page', ['1'])[0])
+                    size = int(params.get('pageSize', ['100'])[0])
+                    start = (page - 1) * size
+                    articles = [
+                        {'title': article['title'], 'url': f"{stand_in.base_url}/articles/{i}"}
+                        for i, article in enumerate(stand_in.articles[start:start + size], start)
+                    ]
+                    body = {'status': 'ok', 'totalResults': len(stand_in.articles), 'articles': articles}
+                    self._send(json.dumps(body).encode('utf-8'), 'application/json')
+
+                elif url.path.startswith('/articles/'):
+                    index = int(url.path.rsplit('/', 1)[-1])
+                    if index >= len(stand_in.articles):
+                        self._send(b'Not found', 'text/plain', status=404)
+                        return
+                    article = stand_in.articles[index]
+                    sentences = SENTENCE_SPLIT.split(article['content'])
+                    paragraphs = [' '.join(sentences[i:i + 4]) for i in range(0, len(sentences), 4)]
+                    html = (f"<html><head><title>{escape(article['title'])}</title></head><body>"
+                            + ''.join(f"<p>{escape(p)}</p>" for p in paragraphs)
+                            + "</body></html>")
+                    self._send(html.encode('utf-8'), 'text/html; charset=utf-8')
+
+                else:
+                    self._send(b'Not found', 'text/plain', status=404)
+
+            def do_POST(self):
+                # The Epidata client falls back to POST for long query strings
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self.do_GET()
+
+        return Handler
+
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules under src/utils are imported by name, as the app and scripts do
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'utils'))
+# The benchmark helpers are imported the same way by run_benchmarks.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark'))
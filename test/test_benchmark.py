@@ -0,0 +1,52 @@
+import json
+import pytest
+from stand_ins import StandInServer, load_articles, load_fluview_records
+from run_benchmarks import compare_reports
+
+
+def report(**items_per_second):
+    return {'stages': {name: {'items_per_second': value} for name, value in items_per_second.items()}}
+
+
+def test_compare_reports_flags_drops_beyond_tolerance():
+    baseline = report(scrape=100.0, search=100.0)
+    current = report(scrape=70.0, search=80.0)
+
+    regressions = compare_reports(current, baseline, tolerance=0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith('scrape: 70.0 items/s vs 100.0 baseline')
+
+
+def test_compare_reports_skips_missing_stages_and_zero_throughput():
+    baseline = report(scrape=100.0, search=0, batch_qa=None)
+    current = report(scrape=100.0, search=5.0, batch_qa=1.0, index=1.0)
+
+    assert compare_reports(current, baseline, tolerance=0.25) == []
+    assert compare_reports(report(scrape=None), baseline, tolerance=0.25) == []
+    assert compare_reports(current, {}, tolerance=0.25) == []
+
+
+def test_pipeline_fetches_from_stand_ins(tmp_path, monkeypatch):
+    Epidata = pytest.importorskip('delphi_epidata').Epidata
+    from infection_scraper import FluDataHandler
+    from news_scraper import NewsScraper
+
+    records = load_fluview_records(1)
+    articles = load_articles(1)[:3]
+    config_path = tmp_path / 'newsapi.yaml'
+    config_path.write_text('key: benchmark\n', encoding='utf-8')
+
+    with StandInServer(records, articles) as server:
+        monkeypatch.setattr(Epidata, 'BASE_URL', f"{server.base_url}/epidata")
+        monkeypatch.setattr(NewsScraper, 'NEWSAPI_URL', f"{server.base_url}/v2/everything")
+
+        fetched = FluDataHandler.get_fluview_data(0, 999999)
+        saved = NewsScraper(str(config_path), str(tmp_path)).fetch_and_save_articles()
+
+    assert len(fetched) == len(records)
+    assert server.bytes_served > 0
+    with open(saved, 'r', encoding='utf-8') as f:
+        scraped = json.load(f)
+    assert [doc['title'] for doc in scraped] == [article['title'] for article in articles]
+    assert all(doc['content'] for doc in scraped)
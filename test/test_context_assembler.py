@@ -0,0 +1,107 @@
+import logging
+import pytest
+from langchain_core.documents import Document
+from context_assembler import ContextAssembler
+
+
+@pytest.fixture(autouse=True)
+def word_token_counter(monkeypatch):
+    # Count whitespace-separated words so budgets are exact and no tiktoken download is needed
+    monkeypatch.setattr(ContextAssembler, '_token_counter', lambda self: lambda text: len(text.split()))
+
+
+def chunk(text, url='https://news.example/a', index=0):
+    return Document(page_content=text, metadata={'title': url, 'url': url, 'chunk_index': index})
+
+
+def test_adjacent_chunks_merge_without_duplicated_overlap():
+    assembler = ContextAssembler(chunk_overlap=40)
+    docs = [
+        chunk('Hospital admissions rose again this week in the northeast.', index=0),
+        chunk('again this week in the northeast. Officials urged vaccination.', index=1),
+    ]
+
+    merged = assembler.merge_adjacent(docs)
+
+    assert len(merged) == 1
+    assert merged[0].page_content == ('Hospital admissions rose again this week in the northeast. '
+                                      'Officials urged vaccination.')
+    assert merged[0].metadata['chunk_index'] == [0, 1]
+
+
+def test_short_or_mid_word_matches_are_not_treated_as_overlap():
+    assembler = ContextAssembler(chunk_overlap=40)
+    docs = [
+        chunk('Beds are short at local hospitals', index=0),
+        chunk('said officials on Monday.', index=1),
+    ]
+
+    merged = assembler.merge_adjacent(docs)
+
+    assert merged[0].page_content == 'Beds are short at local hospitals said officials on Monday.'
+
+
+def test_non_adjacent_chunks_get_gap_marker_and_rank_is_kept():
+    assembler = ContextAssembler()
+    docs = [
+        chunk('Later chunk.', url='https://news.example/b', index=3),
+        chunk('First chunk.', url='https://news.example/a', index=0),
+        chunk('Opening chunk.', url='https://news.example/b', index=1),
+    ]
+
+    merged = assembler.merge_adjacent(docs)
+
+    assert [d.metadata['url'] for d in merged] == ['https://news.example/b', 'https://news.example/a']
+    assert merged[0].page_content == 'Opening chunk.\n...\nLater chunk.'
+    assert merged[0].metadata['chunk_index'] == [1, 3]
+
+
+def test_repeated_sentences_are_removed_across_articles():
+    assembler = ContextAssembler()
+    docs = [
+        chunk('Cases are rising. Masks are advised.', url='https://news.example/a'),
+        chunk('Masks  are ADVISED. Clinics extended hours.', url='https://news.example/b'),
+    ]
+
+    assembled = assembler.compress_documents(docs, 'query')
+
+    assert [d.page_content for d in assembled] == ['Cases are rising. Masks are advised.', 'Clinics extended hours.']
+
+
+def test_token_budget_cuts_off_in_rank_order():
+    assembler = ContextAssembler(token_budget=6)
+    docs = [
+        chunk('One two three. Four five.', url='https://news.example/a'),
+        chunk('Six seven. Eight.', url='https://news.example/b'),
+        chunk('Nine.', url='https://news.example/c'),
+    ]
+
+    assembled = assembler.compress_documents(docs, 'query')
+
+    # 5 words from the first article fit; 'Six seven.' would exceed 6, so assembly stops there
+    assert [d.page_content for d in assembled] == ['One two three. Four five.']
+
+
+def test_warns_when_index_overlap_differs(caplog):
+    with caplog.at_level(logging.WARNING):
+        ContextAssembler(chunk_overlap=100, index_chunk_overlap=200)
+    assert 'differs' in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        ContextAssembler(chunk_overlap=200, index_chunk_overlap=200)
+    assert caplog.text == ''
+
+
+def test_gap_markers_survive_deduplication_in_every_article():
+    assembler = ContextAssembler()
+    docs = [
+        chunk('Alpha one.', url='https://news.example/a', index=0),
+        chunk('Alpha three.', url='https://news.example/a', index=2),
+        chunk('Beta one.', url='https://news.example/b', index=0),
+        chunk('Beta three.', url='https://news.example/b', index=5),
+    ]
+
+    assembled = assembler.compress_documents(docs, 'query')
+
+    assert [d.page_content for d in assembled] == ['Alpha one.\n...\nAlpha three.', 'Beta one.\n...\nBeta three.']
@@ -0,0 +1,11 @@
+import pytest
+from import_budget import measure_cold_start
+
+
+def test_cold_start_does_not_import_llm_stack():
+    pytest.importorskip('streamlit')
+    pytest.importorskip('plotly')
+
+    result = measure_cold_start()
+
+    assert result['deferred_loaded'] == []
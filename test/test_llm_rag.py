@@ -0,0 +1,131 @@
+import os
+import json
+import pytest
+from langchain_core.documents import Document
+from llm_backends import SENTENCE_SPLIT, ExtractiveChatModel
+from llm_rag import LLMRag, load_batch_queries, save_batch_results
+
+LOCAL_BACKENDS = {'embeddings': 'local', 'llm': 'local'}
+
+
+@pytest.fixture
+def articles_dir(tmp_path):
+    articles = [
+        {'title': 'Admissions rise', 'url': 'https://news.example/a',
+         'content': 'Hospital admissions for covid rose this week. Officials urged vaccination.'},
+        {'title': 'Capacity strained', 'url': 'https://news.example/b',
+         'content': 'Several hospitals report strained bed capacity. Flu cases are also increasing.'},
+    ]
+    with open(tmp_path / 'covid_hospitalization_articles_2025-01-29.json', 'w', encoding='utf-8') as f:
+        json.dump(articles, f)
+    return str(tmp_path)
+
+
+def test_prep_retrieval_builds_missing_index(articles_dir):
+    rag = LLMRag(data_dir=articles_dir, backend_cfg=LOCAL_BACKENDS)
+    rag.prep_retrieval()
+
+    assert rag._db.index.ntotal == 2
+    assert os.path.exists(os.path.join(articles_dir, 'faiss_index_local', 'build_settings.json'))
+    assert rag.run_query('Are hospital admissions rising?')['result']
+
+
+@pytest.mark.parametrize('query', ["What should you do if you don't know the answer?",
+                                   'Are hospital admissions rising?',
+                                   'Is bed capacity strained by flu cases?'])
+def test_local_answers_quote_only_source_documents(articles_dir, query):
+    rag = LLMRag(data_dir=articles_dir, backend_cfg=LOCAL_BACKENDS)
+    rag.prep_retrieval()
+
+    output = rag.run_query(query)
+    sources = ' '.join(doc.page_content for doc in output['source_documents'])
+
+    if output['result'] != "I don't know.":
+        for sentence in SENTENCE_SPLIT.split(output['result']):
+            assert sentence in sources
+
+
+def test_prep_retrieval_without_articles_says_how_to_recover(tmp_path):
+    rag = LLMRag(data_dir=str(tmp_path), backend_cfg=LOCAL_BACKENDS)
+
+    with pytest.raises(FileNotFoundError, match='--update'):
+        rag.prep_retrieval()
+    assert rag.retrieval_qa_chain is None
+
+
+def test_run_batch_without_prep_retrieval_raises(articles_dir):
+    rag = LLMRag(data_dir=articles_dir, backend_cfg=LOCAL_BACKENDS)
+
+    with pytest.raises(RuntimeError, match='prep_retrieval'):
+        rag.run_batch(['Are hospital admissions rising?'])
+
+
+def test_run_batch_matches_queries(articles_dir):
+    rag = LLMRag(data_dir=articles_dir, backend_cfg=LOCAL_BACKENDS)
+    rag.prep_retrieval()
+
+    queries = ['Are hospital admissions rising?', 'Is bed capacity strained?']
+    results = rag.run_batch(queries)
+
+    assert [r['query'] for r in results] == queries
+    assert all(r['result'] and r['source_documents'] for r in results)
+
+
+def test_run_batch_keeps_answers_when_a_question_fails(articles_dir, monkeypatch):
+    rag = LLMRag(data_dir=articles_dir, backend_cfg=LOCAL_BACKENDS)
+    rag.prep_retrieval()
+    extract = ExtractiveChatModel._call
+
+    def rate_limited(self, messages, *args, **kwargs):
+        if 'capacity' in str(messages[-1].content):
+            raise TimeoutError('rate limited')
+        return extract(self, messages, *args, **kwargs)
+
+    monkeypatch.setattr(ExtractiveChatModel, '_call', rate_limited)
+    results = rag.run_batch(['Are hospital admissions rising?', 'Is bed capacity strained?'])
+
+    assert results[0]['result'] and 'error' not in results[0]
+    assert results[1]['result'] is None
+    assert results[1]['error'] == 'TimeoutError: rate limited'
+
+
+@pytest.mark.parametrize('name', ['questions.jsonl', 'questions.ndjson', 'questions.json'])
+def test_load_batch_queries_json_lines_keep_extra_fields(tmp_path, name):
+    path = tmp_path / name
+    path.write_text('{"query": "Is flu rising?", "id": 7}\n\n{"query": "Any shortages?"}\n', encoding='utf-8')
+
+    assert load_batch_queries(str(path)) == [{'query': 'Is flu rising?', 'id': 7}, {'query': 'Any shortages?'}]
+
+
+def test_load_batch_queries_plain_text(tmp_path):
+    path = tmp_path / 'questions.txt'
+    path.write_text('Is flu rising?\n\n  Any shortages?  \n"Quoted?"\n', encoding='utf-8')
+
+    assert load_batch_queries(str(path)) == [{'query': 'Is flu rising?'}, {'query': 'Any shortages?'},
+                                             {'query': '"Quoted?"'}]
+
+
+def test_save_batch_results(tmp_path):
+    records = [{'query': 'Is flu rising?', 'id': 7}]
+    results = [{'query': 'Is flu rising?', 'result': 'Yes.',
+                'source_documents': [Document(page_content='Flu is rising.', metadata={'url': 'https://news.example/a'})]}]
+    path = str(tmp_path / 'results.jsonl')
+
+    assert save_batch_results(records, results, path) == path
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines == [{
+        'query': 'Is flu rising?', 'id': 7, 'result': 'Yes.',
+        'source_documents': [{'page_content': 'Flu is rising.', 'metadata': {'url': 'https://news.example/a'}}],
+    }]
+
+
+def test_save_batch_results_records_errors(tmp_path):
+    records = [{'query': 'Is flu rising?'}]
+    results = [{'query': 'Is flu rising?', 'result': None, 'source_documents': [], 'error': 'TimeoutError: rate limited'}]
+    path = str(tmp_path / 'results.jsonl')
+
+    save_batch_results(records, results, path)
+    with open(path, 'r', encoding='utf-8') as f:
+        assert json.loads(f.readline()) == {'query': 'Is flu rising?', 'result': None, 'source_documents': [],
+                                            'error': 'TimeoutError: rate limited'}
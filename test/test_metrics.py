@@ -0,0 +1,61 @@
+import json
+from metrics import PipelineMetrics
+
+
+def test_spans_and_counters_are_recorded():
+    metrics = PipelineMetrics(prefix='test')
+
+    for _ in range(3):
+        with metrics.span('scrape_parse'):
+            pass
+    metrics.increment('bytes_fetched', 100)
+    metrics.increment('bytes_fetched', 50)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['spans']['scrape_parse']['count'] == 3
+    assert snapshot['counters'] == {'bytes_fetched': 150}
+
+    text = metrics.to_prometheus()
+    assert 'test_stage_calls_total{stage="scrape_parse"} 3' in text
+    assert '# TYPE test_bytes_fetched_total counter' in text
+    assert 'test_bytes_fetched_total 150' in text
+
+
+def test_profiles_are_written_on_export_not_per_span(tmp_path):
+    metrics = PipelineMetrics()
+    metrics.enable_profiling(['scrape_article'], output_dir=str(tmp_path / 'profiles'))
+
+    for _ in range(5):
+        with metrics.span('scrape_article'):
+            sum(range(1000))
+        with metrics.span('other'):
+            pass
+    assert not (tmp_path / 'profiles').exists()
+
+    metrics.export(str(tmp_path / 'metrics.json'))
+
+    assert [p.name for p in (tmp_path / 'profiles').iterdir()] == ['scrape_article.prof']
+    with open(tmp_path / 'metrics.json', encoding='utf-8') as f:
+        assert json.load(f)['spans']['scrape_article']['count'] == 5
+
+
+def test_flush_exports_to_pipeline_metrics_path(tmp_path, monkeypatch):
+    path = tmp_path / 'metrics.prom'
+    monkeypatch.setenv('PIPELINE_METRICS', str(path))
+    metrics = PipelineMetrics(prefix='test')
+    metrics.increment('bytes_fetched', 10)
+
+    metrics.flush()
+
+    assert 'test_bytes_fetched_total 10' in path.read_text(encoding='utf-8')
+
+
+def test_flush_without_pipeline_metrics_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.delenv('PIPELINE_METRICS', raising=False)
+    monkeypatch.chdir(tmp_path)
+    metrics = PipelineMetrics()
+    metrics.increment('bytes_fetched', 10)
+
+    metrics.flush()
+
+    assert list(tmp_path.iterdir()) == []
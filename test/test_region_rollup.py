@@ -0,0 +1,135 @@
+import math
+import pytest
+import pandas as pd
+from region_rollup import RegionRollup
+
+NY_POP = 10_000_000
+
+
+@pytest.fixture
+def data_ref(tmp_path):
+    (tmp_path / 'cdc_regions.yaml').write_text(
+        'hhs1:\n'
+        '  name: "region_1"\n'
+        '  states:\n'
+        '    - Alpha\n'
+        '    - Beta\n'
+        '    - New York\n'
+        'cen1:\n'
+        '  name: "first_census"\n'
+        '  states:\n'
+        '    - Alpha\n'
+        '    - Beta\n',
+        encoding='utf-8'
+    )
+    (tmp_path / 'state_populations.csv').write_text(
+        'Name,state_abbreviation,Pop.2023\n'
+        'Alpha,AA,1000\n'
+        'Beta,BB,3000\n'
+        f'New York,NY,{NY_POP}\n',
+        encoding='utf-8'
+    )
+    return str(tmp_path)
+
+
+def fluview_frame(rows):
+    columns = ['region', 'epiweek', 'num_ili', 'num_patients', 'num_providers', 'ili', 'wili']
+    return pd.DataFrame(rows, columns=columns)
+
+
+@pytest.fixture
+def fluview():
+    return fluview_frame([
+        ('AA', 202501, 10, 100, 1, 10.0, 2.0),
+        ('BB', 202501, 30, 300, 2, 10.0, None),
+        ('NY_MINUS_JFK', 202501, 50, 1000, 5, 5.0, 5.0),
+        ('AA', 202502, 20, 100, 1, 20.0, 2.0),
+        ('BB', 202502, 60, 300, 2, 20.0, 4.0),
+        ('CEN1', 202501, 999, 5000, 9, 19.98, 7.5),
+    ])
+
+
+def row(rollup, region, epiweek):
+    match = rollup[(rollup['rollup_region'] == region) & (rollup['epiweek'] == epiweek)]
+    assert len(match) == 1
+    return match.iloc[0]
+
+
+def test_not_built_errors(data_ref):
+    rollup = RegionRollup(data_ref)
+    with pytest.raises(RuntimeError):
+        rollup.aggregate('HHS')
+    with pytest.raises(RuntimeError):
+        rollup.drill_down('HHS1')
+
+
+def test_summed_region_weights_wili_by_population_and_skips_missing(data_ref, fluview):
+    rollup = RegionRollup(data_ref).build(fluview)
+    ny_feed_pop = NY_POP - RegionRollup.STATE_FEED_EXCLUSIONS['NY']
+
+    hhs = row(rollup, 'HHS1', 202501)
+    assert hhs['source'] == 'states'
+    assert hhs['num_ili'] == 90
+    assert hhs['num_patients'] == 1400
+    assert hhs['num_states'] == 3
+    assert hhs['population'] == 1000 + 3000 + ny_feed_pop
+    # BB has no wILI, so its population is left out of the weights
+    assert math.isclose(hhs['wili'], (2.0 * 1000 + 5.0 * ny_feed_pop) / (1000 + ny_feed_pop))
+    assert math.isclose(hhs['infection_rate'], 90 / hhs['population'] * 100000)
+
+    hhs = row(rollup, 'HHS1', 202502)
+    assert hhs['num_states'] == 2
+    assert math.isclose(hhs['wili'], (2.0 * 1000 + 4.0 * 3000) / 4000)
+
+
+def test_reported_region_rows_are_kept(data_ref, fluview):
+    rollup = RegionRollup(data_ref).build(fluview)
+
+    cen = row(rollup, 'CEN1', 202501)
+    assert cen['source'] == 'fluview'
+    assert cen['num_ili'] == 999
+    assert cen['wili'] == 7.5
+    assert cen['population'] == 4000
+    assert cen['region_name'] == 'FIRST_CENSUS'
+    # No state sums are produced for a region FluView reports itself
+    assert not ((rollup['rollup_region'] == 'CEN1') & (rollup['epiweek'] == 202502)).any()
+
+
+def test_aggregate_by_level(data_ref, fluview):
+    rollup = RegionRollup(data_ref)
+    rollup.build(fluview)
+
+    assert set(rollup.aggregate('hhs')['rollup_region']) == {'HHS1'}
+    nation = rollup.aggregate('NAT')
+    assert list(nation['epiweek']) == [202501, 202502]
+    assert list(nation['num_ili']) == [90, 80]
+    assert rollup.aggregate('XYZ').empty
+
+
+def test_drill_down_uses_aliased_state_codes(data_ref, fluview):
+    rollup = RegionRollup(data_ref)
+    rollup.build(fluview)
+
+    states = rollup.drill_down('HHS1')
+    assert set(states.index.get_level_values('state')) == {'AA', 'BB', 'NY'}
+    assert states.loc[('NY', 202501), 'region'] == 'NY_MINUS_JFK'
+
+    week = rollup.drill_down('hhs1', epiweek=202502)
+    assert list(week.index) == [('AA', 202502), ('BB', 202502)]
+    assert list(week['num_ili']) == [20, 60]
+
+    missing = rollup.drill_down('cen1', epiweek=190001)
+    assert missing.empty
+    assert list(missing.columns) == list(states.columns)
+
+
+def test_build_is_cached_per_version(data_ref, fluview):
+    rollup = RegionRollup(data_ref)
+    first = rollup.build(fluview, version='a')
+    assert rollup.build(fluview.iloc[:1], version='a') is first
+
+    rebuilt = rollup.build(fluview.iloc[:1], version='b')
+    assert rebuilt is not first
+    # Without a reported CEN1 row, the census region is summed from its states
+    assert set(rebuilt['rollup_region']) == {'CEN1', 'HHS1', 'NAT'}
+    assert row(rebuilt, 'CEN1', 202501)['source'] == 'states'